@@ -1,6 +1,8 @@
 """策略配置管理"""
 
+import copy
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List
 from alpaca.data.enums import DataFeed
 import yaml
@@ -9,6 +11,23 @@ from pathlib import Path
 from dotenv import load_dotenv
 from utils.log import setup_logging
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # 未编译libyaml时退回纯Python解析器
+    from yaml import SafeLoader as _YamlLoader
+
+
+@lru_cache(maxsize=8)
+def _parse_yaml(path: str, mtime: float) -> dict:
+    """解析YAML配置文件，按路径和修改时间缓存，文件变更后自动重新解析"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+def _load_yaml(path: str) -> dict:
+    """读取YAML配置；返回缓存结果的深拷贝，调用方修改配置不会影响缓存"""
+    return copy.deepcopy(_parse_yaml(path, os.path.getmtime(path)))
+
 
 @dataclass
 class RedisConfig:
@@ -35,6 +54,7 @@ class TradingConfig:
     # 数据设置
     data_feed: DataFeed
     buffer_size: int
+    bar_cache_dir: str
 
     # Redis配置
     redis: RedisConfig
@@ -53,11 +73,12 @@ class TradingConfig:
             # 默认配置文件路径 - 当前工作目录下的 config.yaml
             config_path = Path.cwd() / "config.yaml"
 
-        # 从YAML文件加载symbols
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = yaml.safe_load(f)
+        # 从YAML文件加载symbols（多个组件各自创建配置时复用同一次解析结果）
+        config_path = str(config_path)
+        config_data = _load_yaml(config_path)
 
         symbols = config_data.get('symbols', [])
+        bar_cache_dir = config_data.get('bar_cache_dir', '.cache/bars')
 
         # 从环境变量加载API密钥
         api_key = os.getenv("ALPACA_API_KEY", "")
@@ -84,6 +105,7 @@ class TradingConfig:
             is_test=is_test,
             data_feed=DataFeed.IEX,  # 默认数据源
             buffer_size=1000,  # 默认缓存大小
+            bar_cache_dir=bar_cache_dir,
             redis=redis,
             default_order_qty=default_order_qty,
             time_in_force=time_in_force
@@ -4,25 +4,39 @@ Al Brooks价格行为量化策略 - 基于alpaca-py的数据层架构
 """
 
 from alpaca.data.live import StockDataStream
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
 
-from typing import Dict, List
-import threading
-from datetime import datetime, timedelta
+from typing import Dict
+import asyncio
 
 from config.config import TradingConfig
 from utils.log import setup_logging
-from utils.data_transforms import alpaca_bar_to_bar_data
+from utils.data_transforms import alpaca_raw_bar_to_bar_data
+from utils.history_loader import load_historical_data
 from strategy.strategy_engine import StrategyEngine
+from strategy.bar_worker import StrategyWorker
 from monitor.service import monitor
 from monitor.data import SystemStatus
 from monitor.web_server import WebMonitorServer
 from models.market_data import BarData
 
+try:
+    import uvloop  # 可选依赖，不支持Windows
+except ImportError:
+    uvloop = None
+
 log = setup_logging(module_prefix='ENGINE')
 
+# 数据流websocket参数：保留alpaca-py默认的心跳与队列设置；
+# 关闭permessage-deflate，省去每帧解压产生的额外bytes拷贝；
+# 放大读缓冲（默认64KB），减少高频行情下的小块读取与流控暂停
+STREAM_WEBSOCKET_PARAMS = {
+    "ping_interval": 10,
+    "ping_timeout": 180,
+    "max_queue": 1024,
+    "compression": None,
+    "read_limit": 256 * 1024,
+}
+
 class TradingEngine:
     """交易引擎 - 完整的量化交易系统"""
 
@@ -32,8 +46,7 @@ class TradingEngine:
 
         # 初始化监控服务
         monitor.set_system_status(SystemStatus.STARTING)
-        for symbol in self.symbols:
-            monitor.update_symbol_status(symbol, trend="UNKNOWN", volatility=0.0, volume_profile="UNKNOWN")
+        monitor.register_symbols(self.symbols)
 
         # 启动Web监控服务器
         self.web_monitor = WebMonitorServer(port=8080)
@@ -43,137 +56,93 @@ class TradingEngine:
             log.warning("[MONITOR] 监控面板启动失败")
 
         # 批量加载历史数据
-        historical_data_by_symbol = self._load_historical_data_batch()
+        historical_data_by_symbol = load_historical_data(self.config, self.symbols)
 
         self.strategy_engines: Dict[str, StrategyEngine] = {}
         for symbol in self.symbols:
             # 传入预加载的历史数据
-            symbol_historical_data = historical_data_by_symbol.get(symbol, [])
+            symbol_historical_data = historical_data_by_symbol.get(symbol)
             self.strategy_engines[symbol] = StrategyEngine(
                 symbol,
                 self.config,
                 preloaded_historical_data=symbol_historical_data
             )
 
+        # 策略线程：数据流回调只入队，由策略线程批量执行策略
+        self.strategy_worker = StrategyWorker(self._process_bar)
+
         self.stream = None
-        self.stream_thread = None
         self._init_stream()
 
-    def _load_historical_data_batch(self, days: int = 30) -> Dict[str, List[BarData]]:
-        """批量加载所有symbol的历史数据"""
-        historical_data_by_symbol = {}
-
-        try:
-            client = StockHistoricalDataClient(
-                api_key=self.config.api_key,
-                secret_key=self.config.secret_key
-            )
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # 一次性请求所有symbol的历史数据
-            request = StockBarsRequest(
-                symbol_or_symbols=self.symbols,
-                timeframe=TimeFrame.Minute,
-                start=start_date,
-                end=end_date,
-                feed=self.config.data_feed
-            )
-
-            bars = client.get_stock_bars(request)
-
-            # 按symbol分组历史数据
-            for symbol in self.symbols:
-                symbol_bars = bars.data.get(symbol, [])
-                if symbol_bars:
-                    # 转换为BarData对象
-                    symbol_bar_data = []
-                    for bar in symbol_bars:
-                        bar_data = BarData(
-                            symbol=symbol,
-                            timestamp=bar.timestamp,
-                            open=float(bar.open),
-                            high=float(bar.high),
-                            low=float(bar.low),
-                            close=float(bar.close),
-                            volume=int(bar.volume)
-                        )
-                        symbol_bar_data.append(bar_data)
-
-                    historical_data_by_symbol[symbol] = symbol_bar_data
-                    log.info(f"{symbol}: 批量加载了{len(symbol_bars)}根历史K线")
-                else:
-                    log.warning(f"{symbol}: 未获取到历史数据")
-                    historical_data_by_symbol[symbol] = []
-
-        except Exception as e:
-            log.error(f"批量加载历史数据失败: {e}")
-            # 如果批量加载失败，返回空字典，StrategyEngine将回退到单独加载
-            for symbol in self.symbols:
-                historical_data_by_symbol[symbol] = []
-
-        return historical_data_by_symbol
-
     def _init_stream(self):
         """初始化数据流"""
         self.stream = StockDataStream(
             api_key=self.config.api_key,
             secret_key=self.config.secret_key,
             feed=self.config.data_feed,
+            websocket_params=STREAM_WEBSOCKET_PARAMS,
+            raw_data=True,  # 直接接收msgpack解码后的dict，跳过SDK的Bar模型构造
             url_override="wss://stream.data.alpaca.markets/v2/test" if self.config.is_test else None
         )
 
 
     def start(self):
-        """启动策略"""
+        """启动策略：在调用线程上运行数据流事件循环，阻塞直到数据流结束"""
         log.info("启动交易引擎...")
         monitor.set_system_status(SystemStatus.RUNNING)
         monitor.set_connection_status(data_feed=False, trading_api=True)
 
-        async def on_bar_data(bar):
-            if bar.symbol in self.strategy_engines:
-                bar_data = alpaca_bar_to_bar_data(bar)
-                log.info(f"[BAR] {bar.symbol} 收到K线数据: {bar_data}")
-
-                # 更新监控数据
-                monitor.update_bar_received(bar.symbol)
-                monitor.update_symbol_status(
-                    bar.symbol,
-                    current_price=bar_data.close,
-                    price_change=None,  # TODO: 计算价格变化
-                    price_change_pct=None  # TODO: 计算价格变化百分比
-                )
-
-                # 处理新K线数据
-                signal = self.strategy_engines[bar.symbol].process_new_bar(bar_data)
-
-                # 记录生成的信号
-                if signal:
-                    monitor.add_signal(
-                        symbol=signal.symbol,
-                        signal_type=signal.signal_type,
-                        price=signal.price,
-                        confidence=signal.confidence,
-                        reason=signal.reason
-                    )
+        # 订阅集合在运行期间固定，绑定为闭包局部变量，回调里按dict键O(1)判断归属
+        engines = self.strategy_engines
+        submit = self.strategy_worker.submit
+
+        async def on_bar_data(msg):
+            if msg['S'] in engines:
+                # 数据流事件循环里只做转换和入队，策略计算交给策略线程批量处理
+                submit(alpaca_raw_bar_to_bar_data(msg))
 
         self.stream.subscribe_bars(on_bar_data, *self.symbols)
 
-        def run_stream():
-            log.info(f"[STREAM] 启动Alpaca数据流，数据源: {self.config.data_feed}")
-            log.info(f"[STREAM] 已订阅股票: {self.symbols}")
-            try:
-                monitor.set_connection_status(data_feed=True)
-                self.stream.run()
-            except Exception as e:
-                log.error(f"[ERROR] 数据流运行错误: {e}")
-                monitor.set_connection_status(data_feed=False)
-                monitor.increment_error_count()
-
-        self.stream_thread = threading.Thread(target=run_stream, daemon=False)
-        self.stream_thread.start()
-        log.info(f"已启动实时数据流，监听股票: {self.symbols}")
+        self.strategy_worker.start()
+
+        log.info(f"[STREAM] 启动Alpaca数据流，数据源: {self.config.data_feed}")
+        log.info(f"[STREAM] 已订阅股票: {self.symbols}")
+        if uvloop is not None:
+            # stream.run()内部通过asyncio.run创建事件循环，需在此之前切换策略
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            log.info("[STREAM] 使用uvloop事件循环")
+        # 数据流直接运行在主线程的事件循环上，不再额外起一个线程；
+        # stream.run()自行处理KeyboardInterrupt并在退出时关闭连接
+        try:
+            monitor.set_connection_status(data_feed=True)
+            self.stream.run()
+        except Exception as e:
+            log.error(f"[ERROR] 数据流运行错误: {e}")
+            monitor.increment_error_count()
+        finally:
+            monitor.set_connection_status(data_feed=False)
+
+    def _process_bar(self, bar_data: BarData):
+        """执行单根K线的策略流水线并记录监控数据"""
+        # 逐根K线日志降为DEBUG并交给logbook延迟格式化：未启用DEBUG时不会生成K线的repr
+        log.debug("[BAR] {} 收到K线数据: {}", bar_data.symbol, bar_data)
+
+        # 更新监控数据（股票状态已在启动时注册）
+        # TODO: 计算价格变化与价格变化百分比
+        monitor.record_bar(bar_data.symbol, bar_data.close)
+
+        # 处理新K线数据
+        signal = self.strategy_engines[bar_data.symbol].process_new_bar(bar_data)
+
+        # 记录生成的信号
+        if signal:
+            monitor.add_signal(
+                symbol=signal.symbol,
+                signal_type=signal.signal_type,
+                price=signal.price,
+                confidence=signal.confidence,
+                reason=signal.reason
+            )
 
     def stop(self):
         """停止策略"""
@@ -182,8 +151,7 @@ class TradingEngine:
 
         if self.stream:
             self.stream.stop()
-        if self.stream_thread:
-            self.stream_thread.join(timeout=5)
+        self.strategy_worker.stop()
 
         # 停止Web监控服务器
         if hasattr(self, 'web_monitor'):
@@ -195,7 +163,7 @@ if __name__ == "__main__":
     engine = TradingEngine()
     try:
         engine.start()
-        engine.stream_thread.join()
     except KeyboardInterrupt:
         log.info("收到停止信号...")
+    finally:
         engine.stop()
\ No newline at end of file
@@ -2,20 +2,20 @@
 市场数据相关类型定义
 """
 
-from dataclasses import dataclass, field
+import numpy as np
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Any
-from enum import Enum
+from typing import Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketData:
     """市场数据基类"""
     symbol: str
     timestamp: datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BarData(MarketData):
     """K线数据"""
     open: float
@@ -27,16 +27,16 @@ class BarData(MarketData):
     trade_count: Optional[int] = None
 
 
-class DataEventType(Enum):
-    TRADE = "trade"
-    BAR = "bar"
-    ERROR = "error"
+@dataclass(frozen=True, slots=True)
+class BarArrays:
+    """最近若干根K线的列式数据（每个字段一个按时间排序的 NumPy 数组）"""
+    timestamp: np.ndarray  # UTC 纳秒
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    vwap: np.ndarray
 
-
-@dataclass(frozen=True)
-class DataEvent:
-    """数据事件"""
-    event_type: DataEventType
-    symbol: str
-    data: Any  # TRADE 为 float 价格，BAR 为 BarData
-    timestamp: datetime = field(default_factory=datetime.now)
\ No newline at end of file
+    def __len__(self) -> int:
+        return len(self.close)
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from datetime import datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TradingSignal:
     """交易信号"""
     symbol: str
@@ -17,7 +17,7 @@ class TradingSignal:
     reason: str  # 信号产生的原因
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketContext:
     """市场背景信息"""
     symbol: str
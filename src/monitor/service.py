@@ -7,6 +7,7 @@ import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from collections import deque
+from itertools import islice
 
 from .data import (
     MonitorSnapshot, SymbolStatus, SignalHistory,
@@ -113,7 +114,7 @@ class MonitorService:
                 volume_profile=data.get('volume_profile'),
                 position_size=data.get('position_size')
             )
-            log.debug(f"[MONITOR] 处理市场分析事件: {data['symbol']}")
+            log.debug("[MONITOR] 处理市场分析事件: {}", data['symbol'])
         except Exception as e:
             log.error(f"[MONITOR] 处理市场分析事件失败: {e}")
 
@@ -129,7 +130,7 @@ class MonitorService:
                 reason=data['reason'],
                 executed=data.get('executed', False)
             )
-            log.debug(f"[MONITOR] 处理信号事件: {data['symbol']} {data['signal_type']}")
+            log.debug("[MONITOR] 处理信号事件: {} {}", data['symbol'], data['signal_type'])
         except Exception as e:
             log.error(f"[MONITOR] 处理信号事件失败: {e}")
 
@@ -138,6 +139,33 @@ class MonitorService:
         self.system_status = status
         log.info(f"[MONITOR] 系统状态更新: {status.value}")
 
+    @staticmethod
+    def _new_symbol_status(symbol: str) -> SymbolStatus:
+        """创建股票的初始状态"""
+        return SymbolStatus(
+            symbol=symbol,
+            current_price=None,
+            price_change=None,
+            price_change_pct=None,
+            trend="UNKNOWN",
+            volatility=0.0,
+            volume_profile="UNKNOWN",
+            last_signal_type=None,
+            last_signal_time=None,
+            last_signal_price=None,
+            last_signal_confidence=None,
+            position_size=0.0,
+            unrealized_pnl=0.0,
+            bars_received_today=0,
+            last_bar_time=None
+        )
+
+    def register_symbols(self, symbols: List[str]):
+        """启动时预先创建所有订阅股票的状态，逐根K线更新时无需判断是否首次出现"""
+        for symbol in symbols:
+            if symbol not in self.symbol_status:
+                self.symbol_status[symbol] = self._new_symbol_status(symbol)
+
     def update_symbol_status(self, symbol: str,
                            current_price: Optional[float] = None,
                            price_change: Optional[float] = None,
@@ -148,26 +176,10 @@ class MonitorService:
                            position_size: Optional[float] = None,
                            unrealized_pnl: Optional[float] = None):
         """更新股票状态"""
-        if symbol not in self.symbol_status:
-            self.symbol_status[symbol] = SymbolStatus(
-                symbol=symbol,
-                current_price=None,
-                price_change=None,
-                price_change_pct=None,
-                trend="UNKNOWN",
-                volatility=0.0,
-                volume_profile="UNKNOWN",
-                last_signal_type=None,
-                last_signal_time=None,
-                last_signal_price=None,
-                last_signal_confidence=None,
-                position_size=0.0,
-                unrealized_pnl=0.0,
-                bars_received_today=0,
-                last_bar_time=None
-            )
+        status = self.symbol_status.get(symbol)
+        if status is None:
+            status = self.symbol_status[symbol] = self._new_symbol_status(symbol)
 
-        status = self.symbol_status[symbol]
         if current_price is not None:
             status.current_price = current_price
         if price_change is not None:
@@ -211,11 +223,15 @@ class MonitorService:
 
         log.info(f"[MONITOR] 记录信号: {symbol} {signal_type} @{price}")
 
-    def update_bar_received(self, symbol: str):
-        """更新K线接收计数"""
-        if symbol in self.symbol_status:
-            self.symbol_status[symbol].bars_received_today += 1
-            self.symbol_status[symbol].last_bar_time = datetime.now()
+    def record_bar(self, symbol: str, close: float):
+        """记录收到的K线（逐根K线调用）：一次查找同时更新接收计数、时间与最新价格
+
+        symbol须已通过register_symbols注册
+        """
+        status = self.symbol_status[symbol]
+        status.bars_received_today += 1
+        status.last_bar_time = datetime.now()
+        status.current_price = close
 
     def set_connection_status(self, data_feed: bool = None, trading_api: bool = None):
         """设置连接状态"""
@@ -306,7 +322,10 @@ class MonitorService:
 
     def get_recent_signals(self, limit: int = 50) -> List[SignalHistory]:
         """获取最近的信号历史"""
-        return list(self.signal_history)[-limit:]
+        # 从队尾反向取 limit 个，避免先复制整个 deque（最多1000条）再切片
+        recent = list(islice(reversed(self.signal_history), max(limit, 0)))
+        recent.reverse()
+        return recent
 
     def get_system_health(self) -> SystemHealth:
         """获取系统健康状况"""
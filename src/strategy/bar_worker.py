@@ -0,0 +1,79 @@
+"""
+策略工作线程 - 从有界队列中批量取出K线并依次交给处理函数
+数据流事件循环里只做入队，策略计算在独立线程中串行执行
+"""
+
+import queue
+import threading
+from typing import Callable, Optional
+
+from models.market_data import BarData
+from monitor.service import monitor
+from utils.log import setup_logging
+
+log = setup_logging(module_prefix='STRATEGY')
+
+# 每批最多处理的K线数量
+STRATEGY_BATCH_SIZE = 50
+
+# 待处理K线队列容量：策略线程严重落后时丢弃最旧的K线，保证内存有界、处理最新行情
+BAR_QUEUE_SIZE = 1024
+
+
+class StrategyWorker:
+    """有界队列 + 单个策略线程；submit 不阻塞，stop 发送退出标记并等待线程结束"""
+
+    def __init__(self, handler: Callable[[BarData], None]):
+        self.handler = handler
+        self.bar_queue: queue.Queue = queue.Queue(maxsize=BAR_QUEUE_SIZE)
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动策略线程"""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, bar_data: BarData):
+        """非阻塞入队；队列已满时丢弃最旧的K线，不阻塞数据流事件循环"""
+        self._put(bar_data)
+
+    def stop(self, timeout: float = 5):
+        """发送退出标记并等待策略线程结束"""
+        if self.thread is None:
+            return
+        # 非阻塞发送退出标记：队列已满时丢弃最旧的K线，避免策略线程已退出时停止流程卡住
+        self._put(None)
+        self.thread.join(timeout=timeout)
+
+    def _put(self, item: Optional[BarData]):
+        """入队（None为退出标记），队列已满时丢弃最旧的一项后重试"""
+        while True:
+            try:
+                self.bar_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.bar_queue.get_nowait()
+                    log.warning("[QUEUE] 策略处理积压，丢弃K线: {} {}", dropped.symbol, dropped.timestamp)
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        """批量取出排队的K线并依次处理，收到None时退出"""
+        while True:
+            batch = [self.bar_queue.get()]
+            while len(batch) < STRATEGY_BATCH_SIZE:
+                try:
+                    batch.append(self.bar_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for bar_data in batch:
+                if bar_data is None:
+                    return
+                try:
+                    self.handler(bar_data)
+                except Exception:
+                    # 单根K线处理失败不能终止策略线程，否则队列写满后数据被持续丢弃
+                    log.exception(f"[STRATEGY] {bar_data.symbol} K线处理异常")
+                    monitor.increment_error_count()
@@ -71,15 +71,15 @@ class ExecutionEngine:
 
         if decision.signal is None:
             if decision.reason == "volatility_high":
-                log.warning(f"{signal.symbol}: 波动率过高({context.volatility:.2f})，拒绝信号")
+                log.warning("{}: 波动率过高({:.2f})，拒绝信号", signal.symbol, context.volatility)
             elif decision.reason == "duplicate_signal":
-                log.info(f"{signal.symbol}: 信号频率过高，跳过重复信号")
+                log.info("{}: 信号频率过高，跳过重复信号", signal.symbol)
             else:
-                log.info(f"{signal.symbol}: 风险管理拒绝信号")
+                log.info("{}: 风险管理拒绝信号", signal.symbol)
             return None
 
         if decision.adjusted:
-            log.info(f"{signal.symbol}: 成交量偏低，调整置信度至{decision.signal.confidence:.2f}")
+            log.info("{}: 成交量偏低，调整置信度至{:.2f}", signal.symbol, decision.signal.confidence)
 
         return decision.signal
 
@@ -92,10 +92,10 @@ class ExecutionEngine:
 
         # 基本的置信度阈值检查
         if signal.confidence < 0.6:
-            log.info(f"{signal.symbol}: 信号置信度过低({signal.confidence:.2f})，不执行")
+            log.info("{}: 信号置信度过低({:.2f})，不执行", signal.symbol, signal.confidence)
             return None
 
-        log.info(f"{signal.symbol}: 信号通过执行决策，准备执行")
+        log.info("{}: 信号通过执行决策，准备执行", signal.symbol)
         return signal
 
     @staticmethod
@@ -163,6 +163,11 @@ class ExecutionEngine:
     @staticmethod
     def _ensure_trading_client(config: TradingConfig) -> Optional[TradingClient]:
         """保持单例TradingClient，避免重复建立连接"""
+        # 双重检查：客户端创建后各symbol下单直接读取，不再争用全局锁
+        client = ExecutionEngine._trading_client
+        if client is not None:
+            return client
+
         with ExecutionEngine._client_lock:
             if ExecutionEngine._trading_client is None:
                 try:
@@ -3,13 +3,14 @@
 基于 Al Brooks 价格行为学的无状态分析函数
 """
 
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Tuple
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
-from models.market_data import BarData
+from models.market_data import BarData, BarArrays
 from models.strategy_data import TradingSignal, MarketContext
 from risk.risk_manager import RiskManager
 
@@ -37,6 +38,42 @@ class MarketStructure(Enum):
     TEST_PATTERN = "test_pattern"            # 测试模式
 
 
+@lru_cache(maxsize=16)
+def _ema_tail_weights(span: int, length: int, count: int) -> np.ndarray:
+    """长度为 length 的窗口上 EMA（adjust=True）最后 count 个值的权重矩阵，每行已归一化；窗口长度固定，按参数缓存复用"""
+    decay = 1.0 - 2.0 / (span + 1.0)
+    # lags[i, j]：第 i 个输出位置与第 j 个输入之间相隔的K线数，负数表示尚未出现的输入
+    lags = np.arange(length - count, length)[:, None] - np.arange(length)
+    weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0.0)
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights.flags.writeable = False
+    return weights
+
+
+# 反复使用的状态集合定义为模块级常量，避免每根K线临时构造列表再线性查找
+UPTREND_STRUCTURES = frozenset({MarketStructure.STRONG_TREND_UP, MarketStructure.WEAK_TREND_UP})
+DOWNTREND_STRUCTURES = frozenset({MarketStructure.STRONG_TREND_DOWN, MarketStructure.WEAK_TREND_DOWN})
+STRONG_BAR_QUALITIES = frozenset({BarQuality.STRONG_BULL, BarQuality.STRONG_BEAR})
+BULL_BREAKOUT_TRENDS = frozenset({"UPTREND", "SIDEWAYS"})
+BEAR_BREAKOUT_TRENDS = frozenset({"DOWNTREND", "SIDEWAYS"})
+
+# 各形态识别局部高低点时用到的最大窗口宽度
+SWING_MAX_WINDOW = 3
+
+# 市场结构 -> 趋势字符串，一次字典查找代替逐个比较
+TREND_BY_STRUCTURE = {
+    MarketStructure.STRONG_TREND_UP: "UPTREND",
+    MarketStructure.WEAK_TREND_UP: "UPTREND",
+    MarketStructure.STRONG_TREND_DOWN: "DOWNTREND",
+    MarketStructure.WEAK_TREND_DOWN: "DOWNTREND",
+    MarketStructure.TRADING_RANGE: "SIDEWAYS",
+    MarketStructure.BREAKOUT_ATTEMPT: "BREAKOUT",
+    MarketStructure.TWO_LEG_PULLBACK: "PULLBACK",
+    MarketStructure.WEDGE_PATTERN: "WEDGE",
+    MarketStructure.TEST_PATTERN: "TEST",
+}
+
+
 @dataclass
 class PriceActionContext:
     """价格行为市场背景"""
@@ -55,21 +92,53 @@ class PriceActionContext:
     failed_breakout: Optional[Dict[str, Any]]   # 假突破信息
 
 
-@dataclass
-class AnalysisState:
-    """分析状态数据结构"""
-    last_signal: Optional[TradingSignal]
-    position_size: float
-    current_context: Optional[MarketContext]
+class SwingPoints:
+    """一组K线的局部高低点
+
+    高点序列与取负的低点序列叠成两行一起扫描，逐个距离比较，记录每个点作为局部极值成立的最大窗口宽度，
+    所有窗口宽度、高低点共用这一次扫描；各形态按回看长度切片复用。
+    回看区间内的点与整段数据上的判定相同，只需去掉区间两端不足window的位置
+    """
+
+    def __init__(self, highs: np.ndarray, lows: np.ndarray):
+        self.highs = highs
+        self.lows = lows
+        self._widths: Optional[np.ndarray] = None
+        self._max_window = 0
+
+    def peaks(self, lookback: int, window: int = 2) -> np.ndarray:
+        """最近lookback根K线内的局部高点"""
+        return self._select(self.highs, self._extremum_widths(window)[0] >= window, lookback, window)
+
+    def valleys(self, lookback: int, window: int = 2) -> np.ndarray:
+        """最近lookback根K线内的局部低点"""
+        return self._select(self.lows, self._extremum_widths(window)[1] >= window, lookback, window)
+
+    def _extremum_widths(self, window: int) -> np.ndarray:
+        """第0行为高点、第1行为低点的极值宽度，首次调用时一次扫描到各形态用到的最大宽度"""
+        if self._widths is None or self._max_window < window:
+            self._max_window = max(window, SWING_MAX_WINDOW)
+            self._widths = PriceActionAnalyzer._extremum_width(
+                np.stack((self.highs, -self.lows)), self._max_window
+            )
+        return self._widths
+
+    @staticmethod
+    def _select(data: np.ndarray, mask: np.ndarray, lookback: int, window: int) -> np.ndarray:
+        start = max(len(data) - lookback, 0) + window
+        end = len(data) - window
+        if end <= start:
+            return data[:0]
+        return data[start:end][mask[start:end]]
 
 
 class PriceActionAnalyzer:
     """价格行为分析器"""
 
     @staticmethod
-    def analyze_market_context(bars: pd.DataFrame, current_bar: BarData) -> PriceActionContext:
+    def analyze_market_context(bars: BarArrays, current_bar: BarData) -> PriceActionContext:
         """纯函数：分析当前市场的价格行为背景"""
-        if bars.empty or len(bars) < 5:
+        if len(bars) < 5:
             return PriceActionContext(
                 symbol=current_bar.symbol,
                 current_price=current_bar.close,
@@ -81,27 +150,37 @@ class PriceActionAnalyzer:
                 consecutive_pattern=None
             )
 
+        # 各形态共用的局部高低点（每个窗口宽度只扫描一次）
+        swings = SwingPoints(bars.high, bars.low)
+
+        # 最近20根K线的价格区间，市场结构与关键位判断共用，只做一次最大/最小值归约
+        recent_range = float(bars.high[-20:].max() - bars.low[-20:].min())
+
         # 分析市场结构和趋势强度
         if len(bars) < 10:
             market_structure, trend_strength = PriceActionAnalyzer._simple_trend_analysis(bars, current_bar)
         else:
-            market_structure, trend_strength = PriceActionAnalyzer._analyze_market_structure(bars, current_bar)
+            market_structure, trend_strength = PriceActionAnalyzer._analyze_market_structure(
+                bars, current_bar, swings, recent_range
+            )
 
         # 分析当前K线质量
         bar_quality = PriceActionAnalyzer._analyze_bar_quality(current_bar, bars)
 
         # 检查是否在关键位置
-        at_key_level, key_level_type = PriceActionAnalyzer._check_key_levels(bars, current_bar)
+        at_key_level, key_level_type = PriceActionAnalyzer._check_key_levels(
+            bars, current_bar, swings, recent_range
+        )
 
         # 分析连续K线模式
         consecutive_pattern = PriceActionAnalyzer._analyze_consecutive_pattern(bars)
 
         # 分析Al Brooks高级模式
-        two_leg_pullback = PriceActionAnalyzer._analyze_two_leg_pullback(bars, current_bar)
-        wedge_pattern = PriceActionAnalyzer._analyze_wedge_pattern(bars, current_bar)
-        test_pattern = PriceActionAnalyzer._analyze_test_pattern(bars, current_bar)
-        trendline_break = PriceActionAnalyzer._analyze_trendline_break(bars, current_bar)
-        failed_breakout = PriceActionAnalyzer._analyze_failed_breakout(bars, current_bar)
+        two_leg_pullback = PriceActionAnalyzer._analyze_two_leg_pullback(bars, current_bar, swings)
+        wedge_pattern = PriceActionAnalyzer._analyze_wedge_pattern(bars, current_bar, swings)
+        test_pattern = PriceActionAnalyzer._analyze_test_pattern(bars, current_bar, swings)
+        trendline_break = PriceActionAnalyzer._analyze_trendline_break(bars, current_bar, swings)
+        failed_breakout = PriceActionAnalyzer._analyze_failed_breakout(bars, current_bar, swings)
 
         return PriceActionContext(
             symbol=current_bar.symbol,
@@ -120,9 +199,13 @@ class PriceActionAnalyzer:
         )
 
     @staticmethod
-    def market_analysis(bars: pd.DataFrame, current_bar: BarData) -> MarketContext:
-        """纯函数：基于Al Brooks价格行为学的市场分析"""
-        if bars.empty or len(bars) < 20:
+    def market_analysis(
+        bars: BarArrays,
+        current_bar: BarData,
+        price_action_context: Optional[PriceActionContext] = None
+    ) -> MarketContext:
+        """纯函数：基于Al Brooks价格行为学的市场分析（可传入已计算的价格行为背景）"""
+        if len(bars) < 20:
             return MarketContext(
                 symbol=current_bar.symbol,
                 current_price=current_bar.close,
@@ -132,7 +215,8 @@ class PriceActionAnalyzer:
             )
 
         # 使用价格行为分析获取市场背景
-        price_action_context = PriceActionAnalyzer.analyze_market_context(bars, current_bar)
+        if price_action_context is None:
+            price_action_context = PriceActionAnalyzer.analyze_market_context(bars, current_bar)
 
         # 将价格行为分析结果转换为传统的MarketContext格式
         trend = PriceActionAnalyzer._convert_market_structure_to_trend(price_action_context.market_structure)
@@ -152,19 +236,22 @@ class PriceActionAnalyzer:
         )
 
     @staticmethod
-    def pattern_recognition(bars: pd.DataFrame, context: MarketContext, current_bar: BarData) -> Dict[str, Any]:
-        """纯函数：模式识别 - Al Brooks价格行为模式"""
+    def pattern_recognition(
+        bars: BarArrays,
+        context: MarketContext,
+        current_bar: BarData,
+        price_action_context: Optional[PriceActionContext] = None
+    ) -> Dict[str, Any]:
+        """纯函数：模式识别 - Al Brooks价格行为模式（可传入已计算的价格行为背景）"""
         patterns = {}
 
-        if bars.empty or len(bars) < 10:
+        if len(bars) < 10:
             return patterns
 
         # 简单的价格行为模式识别
-        recent_bars = bars.tail(5)
-
-        # 检测突破模式
-        high_break = context.current_price > recent_bars['high'].max()
-        low_break = context.current_price < recent_bars['low'].min()
+        # 检测突破模式（最近5根K线）
+        high_break = context.current_price > bars.high[-5:].max()
+        low_break = context.current_price < bars.low[-5:].min()
 
         patterns['breakout'] = {
             'high_break': high_break,
@@ -173,15 +260,14 @@ class PriceActionAnalyzer:
         }
 
         # Al Brooks反转模式：基于K线质量和价格行为背景
-        price_action_context = PriceActionAnalyzer.analyze_market_context(bars, current_bar)
+        if price_action_context is None:
+            price_action_context = PriceActionAnalyzer.analyze_market_context(bars, current_bar)
 
         # 基本反转信号：基于K线质量
         if price_action_context.bar_quality == BarQuality.REVERSAL:
             patterns['reversal'] = {
-                'bullish_reversal': (price_action_context.market_structure in
-                                   [MarketStructure.STRONG_TREND_DOWN, MarketStructure.WEAK_TREND_DOWN]),
-                'bearish_reversal': (price_action_context.market_structure in
-                                   [MarketStructure.STRONG_TREND_UP, MarketStructure.WEAK_TREND_UP])
+                'bullish_reversal': price_action_context.market_structure in DOWNTREND_STRUCTURES,
+                'bearish_reversal': price_action_context.market_structure in UPTREND_STRUCTURES
             }
 
         # Al Brooks高级模式
@@ -209,16 +295,21 @@ class PriceActionAnalyzer:
 
     @staticmethod
     def signal_generation(
-        bars: pd.DataFrame,
+        bars: BarArrays,
         bar: BarData,
         last_signal: Optional[TradingSignal] = None
     ) -> Tuple[Optional[TradingSignal], MarketContext]:
         """纯函数：集成市场分析、模式识别和信号生成，返回信号和市场分析结果"""
+        # 价格行为背景只计算一次，供市场分析和模式识别共用
+        price_action_context = (
+            PriceActionAnalyzer.analyze_market_context(bars, bar) if len(bars) >= 20 else None
+        )
+
         # 1. 市场分析
-        context = PriceActionAnalyzer.market_analysis(bars, bar)
+        context = PriceActionAnalyzer.market_analysis(bars, bar, price_action_context)
 
         # 2. 模式识别
-        patterns = PriceActionAnalyzer.pattern_recognition(bars, context, bar)
+        patterns = PriceActionAnalyzer.pattern_recognition(bars, context, bar, price_action_context)
 
         def _apply_risk(candidate: TradingSignal):
             decision = RiskManager.apply_risk_filters(candidate, context, last_signal=last_signal)
@@ -232,7 +323,7 @@ class PriceActionAnalyzer:
 
             # 上涨突破信号 - Al Brooks: 专注价格行为，不依赖成交量
             if (breakout['high_break'] and
-                context.trend in ["UPTREND", "SIDEWAYS"]):
+                context.trend in BULL_BREAKOUT_TRENDS):
 
                 confidence = 0.8 if context.trend == "UPTREND" else 0.6
                 candidate = TradingSignal(
@@ -249,7 +340,7 @@ class PriceActionAnalyzer:
 
             # 下跌突破信号 - Al Brooks: 专注价格行为，不依赖成交量
             if (breakout['low_break'] and
-                context.trend in ["DOWNTREND", "SIDEWAYS"]):
+                context.trend in BEAR_BREAKOUT_TRENDS):
 
                 confidence = 0.8 if context.trend == "DOWNTREND" else 0.6
                 candidate = TradingSignal(
@@ -441,66 +532,64 @@ class PriceActionAnalyzer:
 
     # Al Brooks高级模式识别方法
     @staticmethod
-    def _analyze_two_leg_pullback(bars: pd.DataFrame, current_bar: BarData) -> Optional[Dict[str, Any]]:
+    def _analyze_two_leg_pullback(bars: BarArrays, current_bar: BarData, swings: SwingPoints) -> Optional[Dict[str, Any]]:
         """分析二腿修正模式 - Al Brooks核心概念"""
         if len(bars) < 10:
             return None
 
-        highs = bars['high'].values
-        lows = bars['low'].values
-        closes = bars['close'].values
-
         # 寻找最近的重要高低点
-        recent_highs = PriceActionAnalyzer._find_local_peaks(highs[-15:], window=2)
-        recent_lows = PriceActionAnalyzer._find_local_valleys(lows[-15:], window=2)
+        recent_highs = swings.peaks(15, window=2)
+        recent_lows = swings.valleys(15, window=2)
 
         if len(recent_highs) < 2 or len(recent_lows) < 2:
             return None
 
         current_price = current_bar.close
 
+        # 上面已保证至少各有两个高低点，最后两个各取一次
+        first_low, second_low = recent_lows[-2], recent_lows[-1]
+        first_high, second_high = recent_highs[-2], recent_highs[-1]
+
         # 检测上升趋势中的二腿回调
-        if len(recent_lows) >= 2:
-            # 两个连续的低点，第二个低点高于第一个低点（高低点）
-            if recent_lows[-1] > recent_lows[-2]:
-                # 检查当前价格是否从第二个低点开始反弹
-                if current_price > recent_lows[-1] * 1.005:  # 0.5%的反弹确认
-                    return {
-                        'type': 'bullish_two_leg',
-                        'first_low': recent_lows[-2],
-                        'second_low': recent_lows[-1],
-                        'current_price': current_price,
-                        'strength': min((current_price - recent_lows[-1]) / recent_lows[-1] * 100, 1.0)
-                    }
+        # 两个连续的低点，第二个低点高于第一个低点（高低点）
+        if second_low > first_low:
+            # 检查当前价格是否从第二个低点开始反弹
+            if current_price > second_low * 1.005:  # 0.5%的反弹确认
+                return {
+                    'type': 'bullish_two_leg',
+                    'first_low': first_low,
+                    'second_low': second_low,
+                    'current_price': current_price,
+                    'strength': min((current_price - second_low) / second_low * 100, 1.0)
+                }
 
         # 检测下降趋势中的二腿回调
-        if len(recent_highs) >= 2:
-            # 两个连续的高点，第二个高点低于第一个高点（低高点）
-            if recent_highs[-1] < recent_highs[-2]:
-                # 检查当前价格是否从第二个高点开始下跌
-                if current_price < recent_highs[-1] * 0.995:  # 0.5%的下跌确认
-                    return {
-                        'type': 'bearish_two_leg',
-                        'first_high': recent_highs[-2],
-                        'second_high': recent_highs[-1],
-                        'current_price': current_price,
-                        'strength': min((recent_highs[-1] - current_price) / recent_highs[-1] * 100, 1.0)
-                    }
+        # 两个连续的高点，第二个高点低于第一个高点（低高点）
+        if second_high < first_high:
+            # 检查当前价格是否从第二个高点开始下跌
+            if current_price < second_high * 0.995:  # 0.5%的下跌确认
+                return {
+                    'type': 'bearish_two_leg',
+                    'first_high': first_high,
+                    'second_high': second_high,
+                    'current_price': current_price,
+                    'strength': min((second_high - current_price) / second_high * 100, 1.0)
+                }
 
         return None
 
     @staticmethod
-    def _analyze_wedge_pattern(bars: pd.DataFrame, current_bar: BarData) -> Optional[Dict[str, Any]]:
+    def _analyze_wedge_pattern(bars: BarArrays, current_bar: BarData, swings: SwingPoints) -> Optional[Dict[str, Any]]:
         """分析楔形模式 - 收敛楔形和发散楔形"""
         if len(bars) < 15:
             return None
 
-        highs = bars['high'].values[-15:]
-        lows = bars['low'].values[-15:]
+        highs = bars.high[-15:]
+        lows = bars.low[-15:]
 
         # 寻找高点和低点序列
-        high_peaks = PriceActionAnalyzer._find_local_peaks(highs, window=2)
-        low_valleys = PriceActionAnalyzer._find_local_valleys(lows, window=2)
+        high_peaks = swings.peaks(15, window=2)
+        low_valleys = swings.valleys(15, window=2)
 
         if len(high_peaks) < 3 or len(low_valleys) < 3:
             return None
@@ -537,63 +626,55 @@ class PriceActionAnalyzer:
         return None
 
     @staticmethod
-    def _analyze_test_pattern(bars: pd.DataFrame, current_bar: BarData) -> Optional[Dict[str, Any]]:
+    def _analyze_test_pattern(bars: BarArrays, current_bar: BarData, swings: SwingPoints) -> Optional[Dict[str, Any]]:
         """分析测试模式 - 测试前期高点或低点"""
         if len(bars) < 10:
             return None
 
         current_price = current_bar.close
-        highs = bars['high'].values
-        lows = bars['low'].values
+        highs = bars.high
+        lows = bars.low
 
         # 寻找重要的支撑阻力位
-        recent_highs = PriceActionAnalyzer._find_local_peaks(highs[-20:], window=3)
-        recent_lows = PriceActionAnalyzer._find_local_valleys(lows[-20:], window=3)
+        recent_highs = swings.peaks(20, window=3)
+        recent_lows = swings.valleys(20, window=3)
 
         test_tolerance = (highs.max() - lows.min()) * 0.003  # 0.3%的测试容差
 
         # 测试前期高点（阻力位）
-        for i, high in enumerate(recent_highs):
-            if abs(current_price - high) <= test_tolerance:
-                # 检查是否是第二次或多次测试
-                test_count = sum(1 for h in recent_highs if abs(h - high) <= test_tolerance)
-                if test_count >= 2:
-                    return {
-                        'type': 'resistance_test',
-                        'test_level': high,
-                        'current_price': current_price,
-                        'test_count': test_count,
-                        'test_quality': 'strong' if test_count >= 3 else 'moderate'
-                    }
+        level, test_count = PriceActionAnalyzer._find_tested_level(recent_highs, current_price, test_tolerance)
+        if level is not None:
+            return {
+                'type': 'resistance_test',
+                'test_level': level,
+                'current_price': current_price,
+                'test_count': test_count,
+                'test_quality': 'strong' if test_count >= 3 else 'moderate'
+            }
 
         # 测试前期低点（支撑位）
-        for i, low in enumerate(recent_lows):
-            if abs(current_price - low) <= test_tolerance:
-                # 检查是否是第二次或多次测试
-                test_count = sum(1 for l in recent_lows if abs(l - low) <= test_tolerance)
-                if test_count >= 2:
-                    return {
-                        'type': 'support_test',
-                        'test_level': low,
-                        'current_price': current_price,
-                        'test_count': test_count,
-                        'test_quality': 'strong' if test_count >= 3 else 'moderate'
-                    }
+        level, test_count = PriceActionAnalyzer._find_tested_level(recent_lows, current_price, test_tolerance)
+        if level is not None:
+            return {
+                'type': 'support_test',
+                'test_level': level,
+                'current_price': current_price,
+                'test_count': test_count,
+                'test_quality': 'strong' if test_count >= 3 else 'moderate'
+            }
 
         return None
 
     @staticmethod
-    def _analyze_trendline_break(bars: pd.DataFrame, current_bar: BarData) -> Optional[Dict[str, Any]]:
+    def _analyze_trendline_break(bars: BarArrays, current_bar: BarData, swings: SwingPoints) -> Optional[Dict[str, Any]]:
         """分析微趋势线突破"""
         if len(bars) < 10:
             return None
 
-        highs = bars['high'].values[-10:]
-        lows = bars['low'].values[-10:]
         current_price = current_bar.close
 
         # 分析上升趋势线（连接低点）
-        low_points = PriceActionAnalyzer._find_local_valleys(lows, window=1)
+        low_points = swings.valleys(10, window=1)
         if len(low_points) >= 2:
             # 计算趋势线
             trendline_slope = (low_points[-1] - low_points[-2]) / (len(low_points) - 1)
@@ -610,7 +691,7 @@ class PriceActionAnalyzer:
                 }
 
         # 分析下降趋势线（连接高点）
-        high_points = PriceActionAnalyzer._find_local_peaks(highs, window=1)
+        high_points = swings.peaks(10, window=1)
         if len(high_points) >= 2:
             # 计算趋势线
             trendline_slope = (high_points[-1] - high_points[-2]) / (len(high_points) - 1)
@@ -629,191 +710,202 @@ class PriceActionAnalyzer:
         return None
 
     @staticmethod
-    def _analyze_failed_breakout(bars: pd.DataFrame, current_bar: BarData) -> Optional[Dict[str, Any]]:
+    def _analyze_failed_breakout(bars: BarArrays, current_bar: BarData, swings: SwingPoints) -> Optional[Dict[str, Any]]:
         """分析假突破模式 - Al Brooks重要概念"""
         if len(bars) < 15:
             return None
 
         current_price = current_bar.close
-        highs = bars['high'].values
-        lows = bars['low'].values
+        highs = bars.high
+        lows = bars.low
 
         # 寻找最近的重要支撑阻力位
-        recent_highs = PriceActionAnalyzer._find_local_peaks(highs[-15:], window=2)
-        recent_lows = PriceActionAnalyzer._find_local_valleys(lows[-15:], window=2)
+        recent_highs = swings.peaks(15, window=2)
+        recent_lows = swings.valleys(15, window=2)
 
         if len(recent_highs) < 2 or len(recent_lows) < 2:
             return None
 
-        # 检测向上假突破
-        for high in recent_highs:
-            # 检查是否有突破后快速回落的情况
-            bars_since_high = 0
-            max_penetration = 0
-            for i in range(len(bars) - 5, len(bars)):
-                if i >= 0 and i < len(bars):
-                    bar_high = highs[i] if i < len(highs) else current_bar.high
-                    if bar_high > high:
-                        penetration = (bar_high - high) / high
-                        max_penetration = max(max_penetration, penetration)
-                        bars_since_high = len(bars) - i
+        # 最近5根K线相对每个关键位的穿越幅度（行：关键位，列：K线），一次广播计算；
+        # 先按当前价筛出可能构成假突破的关键位，只对这些关键位计算，都不满足时直接跳过
+        recent_bar_highs = highs[-5:]
+        recent_bar_lows = lows[-5:]
+
+        # 检测向上假突破：当前价需已回落到突破位以下
+        levels = recent_highs[current_price < recent_highs * 0.998]
+        if len(levels):
+            breached = recent_bar_highs > levels[:, None]
+            penetration = (recent_bar_highs - levels[:, None]) / levels[:, None]
+            max_penetration, bars_since_break = PriceActionAnalyzer._penetration_stats(breached, penetration)
 
             # 假突破条件：突破幅度小于2%，且在3根K线内回落到突破位以下
-            if (max_penetration > 0.001 and max_penetration < 0.02 and
-                bars_since_high <= 3 and current_price < high * 0.998):
+            failed = (max_penetration > 0.001) & (max_penetration < 0.02) & (bars_since_break <= 3)
+            if failed.any():
+                i = failed.argmax()
                 return {
                     'type': 'failed_upward_breakout',
-                    'resistance_level': high,
-                    'max_penetration': max_penetration,
+                    'resistance_level': levels[i],
+                    'max_penetration': max_penetration[i],
                     'current_price': current_price,
-                    'bars_since_break': bars_since_high,
+                    'bars_since_break': int(bars_since_break[i]),
                     'signal': 'bearish_reversal'
                 }
 
-        # 检测向下假突破
-        for low in recent_lows:
-            # 检查是否有跌破后快速反弹的情况
-            bars_since_low = 0
-            max_penetration = 0
-            for i in range(len(bars) - 5, len(bars)):
-                if i >= 0 and i < len(bars):
-                    bar_low = lows[i] if i < len(lows) else current_bar.low
-                    if bar_low < low:
-                        penetration = (low - bar_low) / low
-                        max_penetration = max(max_penetration, penetration)
-                        bars_since_low = len(bars) - i
+        # 检测向下假突破：当前价需已反弹到突破位以上
+        levels = recent_lows[current_price > recent_lows * 1.002]
+        if len(levels):
+            breached = recent_bar_lows < levels[:, None]
+            penetration = (levels[:, None] - recent_bar_lows) / levels[:, None]
+            max_penetration, bars_since_break = PriceActionAnalyzer._penetration_stats(breached, penetration)
 
             # 假突破条件：跌破幅度小于2%，且在3根K线内反弹到突破位以上
-            if (max_penetration > 0.001 and max_penetration < 0.02 and
-                bars_since_low <= 3 and current_price > low * 1.002):
+            failed = (max_penetration > 0.001) & (max_penetration < 0.02) & (bars_since_break <= 3)
+            if failed.any():
+                i = failed.argmax()
                 return {
                     'type': 'failed_downward_breakout',
-                    'support_level': low,
-                    'max_penetration': max_penetration,
+                    'support_level': levels[i],
+                    'max_penetration': max_penetration[i],
                     'current_price': current_price,
-                    'bars_since_break': bars_since_low,
+                    'bars_since_break': int(bars_since_break[i]),
                     'signal': 'bullish_reversal'
                 }
 
         return None
 
+    @staticmethod
+    def _find_tested_level(levels: np.ndarray, price: float, tolerance: float) -> Tuple[Optional[float], int]:
+        """找到第一个被当前价格测试、且在容差内被测试过至少两次的关键位，返回(关键位, 测试次数)"""
+        near_price = np.abs(price - levels) <= tolerance
+        if not near_price.any():
+            return None, 0
+
+        # 两两比较所有关键位，统计每个关键位容差范围内的关键位数量（含自身）
+        test_counts = (np.abs(levels[:, None] - levels[None, :]) <= tolerance).sum(axis=1)
+        tested = near_price & (test_counts >= 2)
+        if not tested.any():
+            return None, 0
+
+        i = tested.argmax()
+        return levels[i], int(test_counts[i])
+
+    @staticmethod
+    def _penetration_stats(breached: np.ndarray, penetration: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按关键位统计最大穿越幅度，以及最后一次穿越距今的K线数（未穿越为0）"""
+        max_penetration = np.where(breached, penetration, 0.0).max(axis=1)
+        # 反转列后 argmax 找到最后一根穿越的K线
+        bars_since_break = np.where(breached.any(axis=1), breached[:, ::-1].argmax(axis=1) + 1, 0)
+        return max_penetration, bars_since_break
+
     # 私有辅助方法
     @staticmethod
-    def _analyze_bar_quality(current_bar: BarData, bars: pd.DataFrame) -> BarQuality:
+    def _analyze_bar_quality(current_bar: BarData, bars: BarArrays) -> BarQuality:
         """分析K线质量"""
-        body = abs(current_bar.close - current_bar.open)
-        total_range = current_bar.high - current_bar.low
+        # OHLC 读取一次到局部变量，后续判断（含反转K线）只做浮点运算
+        open_, high, low, close = current_bar.open, current_bar.high, current_bar.low, current_bar.close
+        body = abs(close - open_)
+        total_range = high - low
 
         if total_range == 0:
             return BarQuality.DOJI
 
         body_ratio = body / total_range
+        is_bull = close > open_
+        body_top, body_bottom = (close, open_) if is_bull else (open_, close)
 
         # 计算上下影线
-        if current_bar.close > current_bar.open:  # 阳线
-            upper_shadow = current_bar.high - current_bar.close
-            lower_shadow = current_bar.open - current_bar.low
-        else:  # 阴线
-            upper_shadow = current_bar.high - current_bar.open
-            lower_shadow = current_bar.close - current_bar.low
-
-        upper_shadow_ratio = upper_shadow / total_range if total_range > 0 else 0
-        lower_shadow_ratio = lower_shadow / total_range if total_range > 0 else 0
+        upper_shadow = high - body_top
+        lower_shadow = body_bottom - low
 
         # 十字星判断
         if body_ratio < 0.1:
             return BarQuality.DOJI
 
         # 反转K线判断
-        if PriceActionAnalyzer._is_reversal_bar(current_bar, bars):
+        if PriceActionAnalyzer._is_reversal_bar(body, total_range, upper_shadow, lower_shadow, bars):
             return BarQuality.REVERSAL
 
-        # 强弱K线判断
-        if current_bar.close > current_bar.open:  # 阳线
-            if body_ratio > 0.7 and upper_shadow_ratio < 0.2:
+        # 强弱K线判断：走到这里 body_ratio >= 0.1，振幅必为正，
+        # 影线占比只在实体足够大时按需计算一次，无需再判断除零
+        if is_bull:  # 阳线
+            if body_ratio > 0.7 and upper_shadow / total_range < 0.2:
                 return BarQuality.STRONG_BULL
             else:
                 return BarQuality.WEAK_BULL
         else:  # 阴线
-            if body_ratio > 0.7 and lower_shadow_ratio < 0.2:
+            if body_ratio > 0.7 and lower_shadow / total_range < 0.2:
                 return BarQuality.STRONG_BEAR
             else:
                 return BarQuality.WEAK_BEAR
 
     @staticmethod
-    def _is_reversal_bar(current_bar: BarData, bars: pd.DataFrame) -> bool:
-        """判断是否为反转K线"""
+    def _is_reversal_bar(body: float, total_range: float, upper_shadow: float, lower_shadow: float,
+                         bars: BarArrays) -> bool:
+        """判断是否为反转K线（传入当前K线已算好的实体、振幅与上下影线）"""
         if len(bars) < 3:
             return False
 
-        recent_bars = bars.tail(3)
+        recent_closes = bars.close[-3:]
 
         # 锤头线（下影线长，实体小，在下降趋势中）
-        body = abs(current_bar.close - current_bar.open)
-        total_range = current_bar.high - current_bar.low
-        lower_shadow = min(current_bar.open, current_bar.close) - current_bar.low
-
         if total_range > 0 and lower_shadow > body * 2 and body / total_range < 0.3:
             # 检查是否在下降趋势中
-            if PriceActionAnalyzer._is_in_downtrend(recent_bars):
+            if PriceActionAnalyzer._is_in_downtrend(recent_closes):
                 return True
 
         # 上吊线（上影线长，实体小，在上升趋势中）
-        upper_shadow = current_bar.high - max(current_bar.open, current_bar.close)
         if total_range > 0 and upper_shadow > body * 2 and body / total_range < 0.3:
             # 检查是否在上升趋势中
-            if PriceActionAnalyzer._is_in_uptrend(recent_bars):
+            if PriceActionAnalyzer._is_in_uptrend(recent_closes):
                 return True
 
         return False
 
     @staticmethod
-    def _is_in_uptrend(bars: pd.DataFrame) -> bool:
+    def _is_in_uptrend(closes: np.ndarray) -> bool:
         """判断是否处于上升趋势"""
-        if len(bars) < 3:
+        if len(closes) < 3:
             return False
-        closes = bars['close'].values
         return closes[-1] > closes[-2] > closes[-3]
 
     @staticmethod
-    def _is_in_downtrend(bars: pd.DataFrame) -> bool:
+    def _is_in_downtrend(closes: np.ndarray) -> bool:
         """判断是否处于下降趋势"""
-        if len(bars) < 3:
+        if len(closes) < 3:
             return False
-        closes = bars['close'].values
         return closes[-1] < closes[-2] < closes[-3]
 
     @staticmethod
-    def _analyze_market_structure(bars: pd.DataFrame, current_bar: BarData) -> Tuple[MarketStructure, float]:
-        """分析市场结构和趋势强度"""
+    def _analyze_market_structure(
+        bars: BarArrays, current_bar: BarData, swings: SwingPoints, recent_range: float
+    ) -> Tuple[MarketStructure, float]:
+        """分析市场结构和趋势强度（recent_range 为最近20根K线的最高价与最低价之差）"""
         if len(bars) < 10:
             return MarketStructure.TRADING_RANGE, 0.0
 
-        # 分析高点低点序列
-        highs = bars['high'].values
-        lows = bars['low'].values
-        closes = bars['close'].values
+        closes = bars.close
 
         # 获取最近的高低点
-        recent_highs = PriceActionAnalyzer._find_local_peaks(highs[-20:], window=2)
-        recent_lows = PriceActionAnalyzer._find_local_valleys(lows[-20:], window=2)
+        recent_highs = swings.peaks(20, window=2)
+        recent_lows = swings.valleys(20, window=2)
 
         # 判断趋势方向和强度
         if len(recent_highs) >= 2 and len(recent_lows) >= 2:
-            # 高点序列分析
-            higher_highs = recent_highs[-1] > recent_highs[-2] if len(recent_highs) >= 2 else False
-            higher_lows = recent_lows[-1] > recent_lows[-2] if len(recent_lows) >= 2 else False
+            # 高点序列分析（最后两个高低点各取一次）
+            prev_high, last_high = recent_highs[-2], recent_highs[-1]
+            prev_low, last_low = recent_lows[-2], recent_lows[-1]
+            higher_highs = last_high > prev_high
+            higher_lows = last_low > prev_low
 
-            lower_highs = recent_highs[-1] < recent_highs[-2] if len(recent_highs) >= 2 else False
-            lower_lows = recent_lows[-1] < recent_lows[-2] if len(recent_lows) >= 2 else False
+            lower_highs = last_high < prev_high
+            lower_lows = last_low < prev_low
 
             # 计算趋势强度
-            price_range = max(highs[-20:]) - min(lows[-20:])
-            if price_range == 0:
+            if recent_range == 0:
                 trend_strength = 0.0
             else:
                 recent_move = abs(closes[-1] - closes[-10])
-                trend_strength = min(recent_move / price_range, 1.0)
+                trend_strength = min(recent_move / recent_range, 1.0)
 
             # 判断市场结构
             if higher_highs and higher_lows:
@@ -832,57 +924,35 @@ class PriceActionAnalyzer:
             return PriceActionAnalyzer._analyze_ema_trend(bars, current_bar)
 
     @staticmethod
-    def _find_local_peaks(data: List[float], window: int = 2) -> List[float]:
-        """寻找局部高点"""
-        peaks = []
-        if len(data) < window * 2 + 1:
-            return peaks
-
-        for i in range(window, len(data) - window):
-            is_peak = True
-            for j in range(1, window + 1):
-                if data[i] < data[i-j] or data[i] < data[i+j]:
-                    is_peak = False
-                    break
-            if is_peak:
-                peaks.append(data[i])
-        return peaks
+    def _extremum_width(data: np.ndarray, max_window: int) -> np.ndarray:
+        """每个点作为局部高点（不低于前后各w根K线）成立的最大宽度w，不超过max_window；最后一维为时间，其余维度逐行独立"""
+        n = data.shape[-1]
+        width = np.zeros(data.shape, dtype=np.int8)
+        for k in range(1, max_window + 1):
+            if n < k * 2 + 1:
+                break
+            center = data[..., k:n - k]
+            inner = width[..., k:n - k]
+            # 只有距离1..k-1都成立的点（宽度为k-1）才继续比较距离k的两侧
+            inner += (inner == k - 1) & (center >= data[..., :n - k * 2]) & (center >= data[..., k * 2:])
+        return width
 
     @staticmethod
-    def _find_local_valleys(data: List[float], window: int = 2) -> List[float]:
-        """寻找局部低点"""
-        valleys = []
-        if len(data) < window * 2 + 1:
-            return valleys
-
-        for i in range(window, len(data) - window):
-            is_valley = True
-            for j in range(1, window + 1):
-                if data[i] > data[i-j] or data[i] > data[i+j]:
-                    is_valley = False
-                    break
-            if is_valley:
-                valleys.append(data[i])
-        return valleys
-
-    @staticmethod
-    def _check_key_levels(bars: pd.DataFrame, current_bar: BarData) -> Tuple[bool, Optional[str]]:
-        """检查是否在关键支撑阻力位"""
+    def _check_key_levels(
+        bars: BarArrays, current_bar: BarData, swings: SwingPoints, recent_range: float
+    ) -> Tuple[bool, Optional[str]]:
+        """检查是否在关键支撑阻力位（recent_range 为最近20根K线的最高价与最低价之差）"""
         if len(bars) < 20:
             return False, None
 
         current_price = current_bar.close
 
-        # 寻找重要的支撑阻力位
-        highs = bars['high'].values
-        lows = bars['low'].values
-
         # 寻找最近20根K线的重要高低点
-        recent_highs = PriceActionAnalyzer._find_local_peaks(highs[-20:])
-        recent_lows = PriceActionAnalyzer._find_local_valleys(lows[-20:])
+        recent_highs = swings.peaks(20)
+        recent_lows = swings.valleys(20)
 
         # 检查当前价格是否接近这些关键位置
-        tolerance = (max(highs[-20:]) - min(lows[-20:])) * 0.005  # 0.5%容差
+        tolerance = recent_range * 0.005  # 0.5%容差
 
         for high in recent_highs:
             if abs(current_price - high) <= tolerance:
@@ -895,44 +965,53 @@ class PriceActionAnalyzer:
         return False, None
 
     @staticmethod
-    def _analyze_consecutive_pattern(bars: pd.DataFrame) -> Optional[str]:
+    def _analyze_consecutive_pattern(bars: BarArrays) -> Optional[str]:
         """分析连续K线模式"""
         if len(bars) < 5:
             return None
 
-        recent_closes = bars['close'].tail(5).values
+        # 最近5根收盘价转成Python浮点后顺序走一遍，用计数器记录截至最新一根的连涨/连跌次数
+        closes = bars.close[-5:].tolist()
+        rising_streak = falling_streak = 0
+        for prev_close, close in zip(closes, closes[1:]):
+            if close > prev_close:
+                rising_streak += 1
+                falling_streak = 0
+            elif close < prev_close:
+                falling_streak += 1
+                rising_streak = 0
+            else:
+                rising_streak = falling_streak = 0
 
         # 连续上涨
-        if all(recent_closes[i] < recent_closes[i+1] for i in range(4)):
+        if rising_streak == 4:
             return "consecutive_bull"
 
         # 连续下跌
-        if all(recent_closes[i] > recent_closes[i+1] for i in range(4)):
+        if falling_streak == 4:
             return "consecutive_bear"
 
         # 三连阳/阴
-        if len(recent_closes) >= 3:
-            if all(recent_closes[i] < recent_closes[i+1] for i in range(-3, -1)):
-                return "three_bull"
-            if all(recent_closes[i] > recent_closes[i+1] for i in range(-3, -1)):
-                return "three_bear"
+        if rising_streak >= 2:
+            return "three_bull"
+        if falling_streak >= 2:
+            return "three_bear"
 
         return None
 
     @staticmethod
-    def _analyze_ema_trend(bars: pd.DataFrame, current_bar: BarData) -> Tuple[MarketStructure, float]:
+    def _analyze_ema_trend(bars: BarArrays, current_bar: BarData) -> Tuple[MarketStructure, float]:
         """基于EMA20简单趋势判断"""
         if len(bars) < 20:
             return MarketStructure.TRADING_RANGE, 0.0
 
         # 计算EMA20
-        closes = bars['close']
-        ema20 = closes.ewm(span=20).mean()
+        ema20 = PriceActionAnalyzer._ema_tail(bars.close, span=20, count=10)
         current_price = current_bar.close
-        current_ema = ema20.iloc[-1]
+        current_ema = ema20[-1]
 
         # 检查最近几根K线是否反复穿越EMA20
-        recent_crosses = PriceActionAnalyzer._count_ema_crosses(bars.tail(10), ema20.tail(10))
+        recent_crosses = PriceActionAnalyzer._count_ema_crosses(bars.close[-10:], ema20[-10:])
 
         # 计算价格偏离EMA的程度作为趋势强度
         price_deviation = abs(current_price - current_ema) / current_ema if current_ema > 0 else 0.0
@@ -955,36 +1034,32 @@ class PriceActionAnalyzer:
             return MarketStructure.TRADING_RANGE, trend_strength
 
     @staticmethod
-    def _count_ema_crosses(bars: pd.DataFrame, ema_values: pd.Series) -> int:
+    def _count_ema_crosses(closes: np.ndarray, ema_values: np.ndarray) -> int:
         """计算价格穿越EMA的次数"""
-        if len(bars) < 2 or len(ema_values) < 2:
+        if len(closes) < 2 or len(ema_values) < 2:
             return 0
 
-        crosses = 0
-        closes = bars['close'].values
-        ema_vals = ema_values.values
-
-        for i in range(1, len(closes)):
-            prev_above = closes[i-1] > ema_vals[i-1]
-            curr_above = closes[i] > ema_vals[i]
-
-            if prev_above != curr_above:
-                crosses += 1
+        above = closes > ema_values
+        return int(np.count_nonzero(above[1:] != above[:-1]))
 
-        return crosses
+    @staticmethod
+    def _ema_tail(values: np.ndarray, span: int, count: int) -> np.ndarray:
+        """指数移动平均的最后 count 个值，与 pandas 的 ewm(span=span).mean().iloc[-count:] 一致"""
+        # 分析只读取末尾几根K线的EMA，用缓存的权重矩阵做一次矩阵向量乘，不再递推整个窗口
+        weights = _ema_tail_weights(span, len(values), min(count, len(values)))
+        return weights @ values
 
     @staticmethod
-    def _simple_trend_analysis(bars: pd.DataFrame, current_bar: BarData) -> Tuple[MarketStructure, float]:
+    def _simple_trend_analysis(bars: BarArrays, current_bar: BarData) -> Tuple[MarketStructure, float]:
         """简单的价格趋势分析（当数据不足20根时使用）"""
         if len(bars) < 5:
             return MarketStructure.TRADING_RANGE, 0.0
 
-        closes = bars['close']
+        closes = bars.close
         current_price = current_bar.close
 
         if len(bars) >= 10:
-            ema = closes.ewm(span=10).mean()
-            current_ema = ema.iloc[-1]
+            current_ema = PriceActionAnalyzer._ema_tail(closes, span=10, count=1)[-1]
         else:
             current_ema = closes.mean()
 
@@ -1003,22 +1078,7 @@ class PriceActionAnalyzer:
     @staticmethod
     def _convert_market_structure_to_trend(market_structure: MarketStructure) -> str:
         """将市场结构转换为趋势字符串"""
-        if market_structure in [MarketStructure.STRONG_TREND_UP, MarketStructure.WEAK_TREND_UP]:
-            return "UPTREND"
-        elif market_structure in [MarketStructure.STRONG_TREND_DOWN, MarketStructure.WEAK_TREND_DOWN]:
-            return "DOWNTREND"
-        elif market_structure == MarketStructure.TRADING_RANGE:
-            return "SIDEWAYS"
-        elif market_structure == MarketStructure.BREAKOUT_ATTEMPT:
-            return "BREAKOUT"
-        elif market_structure == MarketStructure.TWO_LEG_PULLBACK:
-            return "PULLBACK"
-        elif market_structure == MarketStructure.WEDGE_PATTERN:
-            return "WEDGE"
-        elif market_structure == MarketStructure.TEST_PATTERN:
-            return "TEST"
-        else:
-            return "UNKNOWN"
+        return TREND_BY_STRUCTURE.get(market_structure, "UNKNOWN")
 
     @staticmethod
     def _calculate_price_action_volatility(context: PriceActionContext) -> float:
@@ -1027,7 +1087,7 @@ class PriceActionAnalyzer:
         base_volatility = context.trend_strength * 3.0
 
         # 根据K线质量调整
-        if context.bar_quality in [BarQuality.STRONG_BULL, BarQuality.STRONG_BEAR]:
+        if context.bar_quality in STRONG_BAR_QUALITIES:
             base_volatility *= 1.2
         elif context.bar_quality == BarQuality.DOJI:
             base_volatility *= 0.7
@@ -1041,12 +1101,12 @@ class PriceActionAnalyzer:
         return min(base_volatility, 10.0)
 
     @staticmethod
-    def _analyze_volume_profile(bars: pd.DataFrame, current_bar: BarData) -> str:
+    def _analyze_volume_profile(bars: BarArrays, current_bar: BarData) -> str:
         """分析成交量概况"""
         if len(bars) < 10:
             return "UNKNOWN"
 
-        avg_volume = bars['volume'].rolling(window=10).mean().iloc[-1]
+        avg_volume = bars.volume[-10:].mean()
         current_volume = current_bar.volume
 
         if current_volume > avg_volume * 1.5:
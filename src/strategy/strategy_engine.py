@@ -5,16 +5,14 @@
 
 import pandas as pd
 from typing import Optional, Dict, Any
-from collections import deque
-import threading
 
 from models.market_data import BarData
 from models.strategy_data import TradingSignal, MarketContext
 from utils.log import setup_logging
 from config.config import TradingConfig
 from utils.events import event_bus, EventTypes, publish_event
-from utils.data_transforms import bars_to_dataframe, get_latest_bars_slice
-from .price_action_analyzer import PriceActionAnalyzer, PriceActionContext, BarQuality, MarketStructure
+from utils.bar_buffer import BarRingBuffer
+from .price_action_analyzer import PriceActionAnalyzer
 from .execution_engine import ExecutionEngine
 
 log = setup_logging(module_prefix='STRATEGY')
@@ -25,10 +23,9 @@ class StrategyEngine:
     策略引擎 - 协调单个股票的完整策略流水线
     """
 
-    def __init__(self, symbol: str, config: Optional[TradingConfig] = None, preloaded_historical_data: Optional[list] = None):
+    def __init__(self, symbol: str, config: Optional[TradingConfig] = None, preloaded_historical_data: Optional[pd.DataFrame] = None):
         self.symbol = symbol
         self.config = config or TradingConfig.create()
-        self.historical_data: Optional[pd.DataFrame] = None
         self.current_context: Optional[MarketContext] = None
 
         # 策略状态
@@ -37,29 +34,24 @@ class StrategyEngine:
 
         # 实时数据缓存
         self.buffer_size = getattr(config, 'buffer_size', 1000) if config else 1000
-        self.bar_buffer: deque = deque(maxlen=self.buffer_size)
+        self.bar_buffer = BarRingBuffer(self.buffer_size)
         self.latest_bar: Optional[BarData] = None
-        self.lock = threading.Lock()
 
         # 注意：现在使用纯函数版本的价格行为分析器和执行引擎，无需实例化
 
         # 加载预加载的历史数据
-        self._load_preloaded_data(preloaded_historical_data or [])
+        self._load_preloaded_data(preloaded_historical_data)
 
-    def _load_preloaded_data(self, historical_data: list):
+    def _load_preloaded_data(self, historical_data: Optional[pd.DataFrame]):
         """使用预加载的历史数据"""
-        if historical_data:
-            # 将预加载的BarData对象直接添加到buffer
-            for bar_data in historical_data:
-                self.bar_buffer.append(bar_data)
+        if historical_data is not None and not historical_data.empty:
+            # 按列批量写入环形缓冲区（只保留最近buffer_size根）
+            self.bar_buffer.load_frame(historical_data)
 
+            # 不保留整段历史DataFrame的引用，加载完成后即可释放
             log.info(f"{self.symbol}: 使用预加载的{len(historical_data)}根历史K线")
-
-            # 保留DataFrame格式的历史数据作为备份（可选）
-            self.historical_data = bars_to_dataframe(historical_data)
         else:
             log.warning(f"{self.symbol}: 预加载历史数据为空")
-            self.historical_data = pd.DataFrame()
 
 
     def process_new_bar(self, bar_data: BarData) -> Optional[TradingSignal]:
@@ -70,8 +62,9 @@ class StrategyEngine:
             # 先添加新K线到缓存
             self.add_bar(bar_data)
 
-            # 获取最近的K线数据用于分析
-            recent_bars = self.get_recent_bars(50)
+            # 获取最近的K线列式数组用于分析（不构建DataFrame）；
+            # 分析与写入都在策略线程内串行执行，直接使用缓冲区视图，省去逐列复制
+            recent_bars = self.bar_buffer.view_recent_arrays(50)
             if len(recent_bars) < 20:  # 数据不够，跳过
                 return None
 
@@ -130,27 +123,19 @@ class StrategyEngine:
 
 
     def add_bar(self, bar: BarData):
-        """添加新的K线数据到缓存"""
-        with self.lock:
-            self.bar_buffer.append(bar)
-            self.latest_bar = bar
+        """添加新的K线数据到缓存（单写者，无需加锁）"""
+        self.bar_buffer.append(bar)
+        self.latest_bar = bar
 
     def get_recent_bars(self, count: int = 50) -> pd.DataFrame:
-        """获取最近的K线数据"""
-        with self.lock:
-            if len(self.bar_buffer) == 0:
-                return pd.DataFrame()
-
-            # 获取最近的K线并转换为DataFrame
-            all_bars = list(self.bar_buffer)
-            recent_bars = get_latest_bars_slice(all_bars, count)
-            return bars_to_dataframe(recent_bars)
+        """获取最近的K线数据（须在策略线程内调用）"""
+        return self.bar_buffer.get_recent_bars(count)
 
     def get_current_price(self) -> Optional[float]:
         """获取当前价格"""
-        with self.lock:
-            # 使用最新K线收盘价
-            if self.latest_bar is not None:
-                return self.latest_bar.close
+        # 属性赋值在GIL下是原子的，直接读取最新K线收盘价
+        latest_bar = self.latest_bar
+        if latest_bar is not None:
+            return latest_bar.close
 
-            return None
+        return None
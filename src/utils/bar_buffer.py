@@ -0,0 +1,113 @@
+"""
+K线环形缓冲区 - 按列（SoA）存储固定容量的K线数据
+每个字段一个预分配的 NumPy 数组，配合写游标实现 O(1) 追加
+只在单个线程内使用（写入与读取都在策略线程），不做跨线程同步
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+from models.market_data import BarData, BarArrays
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class BarRingBuffer:
+    """单个股票的K线环形缓冲区"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # 价格保持 float64：分析时要与实时K线的 float64 价格做千分位级别的比较，
+        # float32 只有约7位有效数字，会改变突破/测试等判定；缓冲区容量有限，内存收益可忽略
+        # 同类型的列放在同一个二维数组里（每行一列），读取快照时每种类型只需一次切片复制
+        self._prices = np.empty((5, capacity), dtype=np.float64)
+        self._integers = np.empty((2, capacity), dtype=np.int64)
+        self.open, self.high, self.low, self.close, self.vwap = self._prices
+        self.timestamp, self.volume = self._integers  # timestamp 为 UTC 纳秒
+
+        self._idx = 0      # 下一个写入位置
+        self._filled = 0   # 已写入的K线数量（不超过容量）
+
+    def __len__(self) -> int:
+        return self._filled
+
+    def append(self, bar: BarData):
+        """写入一根K线，缓冲区满时覆盖最旧的数据"""
+        idx = self._idx
+        self.open[idx] = bar.open
+        self.high[idx] = bar.high
+        self.low[idx] = bar.low
+        self.close[idx] = bar.close
+        self.vwap[idx] = np.nan if bar.vwap is None else bar.vwap
+        self.volume[idx] = bar.volume
+        # 整数运算换算UTC纳秒，比逐根构造 pd.Timestamp 快数倍（K线时间戳均为带时区的UTC时间）
+        self.timestamp[idx] = (bar.timestamp - _EPOCH) // _MICROSECOND * 1000
+
+        self._idx = (idx + 1) % self.capacity
+        if self._filled < self.capacity:
+            self._filled += 1
+
+    def load_frame(self, df: pd.DataFrame):
+        """从历史K线 DataFrame 按列批量写入（只保留最近 capacity 根）"""
+        tail = df.iloc[-self.capacity:]
+        n = len(tail)
+
+        self.open[:n] = tail['open'].to_numpy(dtype=np.float64)
+        self.high[:n] = tail['high'].to_numpy(dtype=np.float64)
+        self.low[:n] = tail['low'].to_numpy(dtype=np.float64)
+        self.close[:n] = tail['close'].to_numpy(dtype=np.float64)
+        self.vwap[:n] = tail['vwap'].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.volume[:n] = tail['volume'].to_numpy(dtype=np.int64)
+        self.timestamp[:n] = tail.index.as_unit('ns').asi8
+        self._idx = n % self.capacity
+        self._filled = n
+
+    def _recent(self, block: np.ndarray, count: int) -> np.ndarray:
+        """取二维列块中每列最近 count 个值（按时间顺序）的副本"""
+        start = self._idx - count
+        if start >= 0:
+            return block[:, start:self._idx].copy()
+        return np.concatenate((block[:, start:], block[:, :self._idx]), axis=1)
+
+    def get_recent_arrays(self, count: int) -> BarArrays:
+        """获取最近 count 根K线的列式数组副本"""
+        n = min(count, self._filled)
+        opens, highs, lows, closes, vwaps = self._recent(self._prices, n)
+        timestamps, volumes = self._recent(self._integers, n)
+        return BarArrays(timestamps, opens, highs, lows, closes, volumes, vwaps)
+
+    def view_recent_arrays(self, count: int) -> BarArrays:
+        """最近 count 根K线的列式视图，区间未跨越缓冲区末尾时不复制
+
+        视图直接引用缓冲区，下一次写入后即失效
+        """
+        n = min(count, self._filled)
+        start = self._idx - n
+        if start < 0:
+            return self.get_recent_arrays(count)
+
+        opens, highs, lows, closes, vwaps = self._prices[:, start:self._idx]
+        timestamps, volumes = self._integers[:, start:self._idx]
+        return BarArrays(timestamps, opens, highs, lows, closes, volumes, vwaps)
+
+    def get_recent_bars(self, count: int) -> pd.DataFrame:
+        """获取最近 count 根K线的 DataFrame（用于展示等非热路径）"""
+        arrays = self.get_recent_arrays(count)
+        if len(arrays) == 0:
+            return pd.DataFrame()
+
+        return pd.DataFrame(
+            {
+                'open': arrays.open,
+                'high': arrays.high,
+                'low': arrays.low,
+                'close': arrays.close,
+                'volume': arrays.volume,
+                'vwap': arrays.vwap
+            },
+            # 缓冲区里已是UTC纳秒整数：按datetime64[ns]视图直接包装成索引，不经过to_datetime的逐元素转换
+            index=pd.DatetimeIndex(arrays.timestamp.view('M8[ns]'), name='timestamp').tz_localize('UTC'),
+            copy=False
+        )
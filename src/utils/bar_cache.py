@@ -0,0 +1,105 @@
+"""
+历史K线本地缓存 - 按 数据源/股票/周期/UTC日期 分文件存储
+只缓存已经结束的完整UTC日，当天（未结束）的数据始终从API获取
+每天一个 .npz 文件，按列保存 UTC 纳秒时间戳与各价格/成交量数组（不使用pickle，读取时不会执行代码）
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from utils.log import setup_logging
+
+log = setup_logging(module_prefix='DATA')
+
+_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'vwap')
+
+
+class HistoricalBarCache:
+    """历史K线磁盘缓存"""
+
+    def __init__(self, cache_dir: str, feed: str, timeframe: str):
+        self.root = Path(cache_dir) / feed
+        self.timeframe = timeframe
+
+    def _path(self, symbol: str, day: date) -> Path:
+        return self.root / symbol / self.timeframe / f"{day.isoformat()}.npz"
+
+    @staticmethod
+    def complete_days(start: datetime, end: datetime) -> List[date]:
+        """[start, end) 范围内已结束的UTC日（不含 end 所在的当天）"""
+        first = start.date()
+        count = max((end.date() - first).days, 0)
+        return [first + timedelta(days=i) for i in range(count)]
+
+    def load(self, symbol: str, days: List[date]) -> Tuple[pd.DataFrame, Optional[date]]:
+        """按日期顺序读取缓存K线，直到第一个缺失或损坏的日期
+
+        返回已读取部分的拼接结果，以及需要从API重新获取的第一个日期（全部命中时为None）；
+        无法读取的缓存文件会被删除，从该日起重新获取，不影响其余数据的加载
+        """
+        frames = []
+        missing_day = None
+        for day in days:
+            path = self._path(symbol, day)
+            if not path.exists():
+                missing_day = day
+                break
+            try:
+                frame = self._read_day(path)
+            except Exception as e:
+                log.warning(f"{symbol}: 缓存文件损坏，删除后重新获取 {path}: {e}")
+                path.unlink(missing_ok=True)
+                missing_day = day
+                break
+            if not frame.empty:
+                frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(), missing_day
+        return pd.concat(frames), missing_day
+
+    @staticmethod
+    def _read_day(path: Path) -> pd.DataFrame:
+        """读取单日缓存文件（allow_pickle=False，只接受纯数值数组）"""
+        with np.load(path, allow_pickle=False) as data:
+            index = pd.DatetimeIndex(data['timestamp'].view('M8[ns]'), name='timestamp').tz_localize('UTC')
+            return pd.DataFrame({col: data[col] for col in _COLUMNS}, index=index, copy=False)
+
+    @staticmethod
+    def _write_day(path: Path, df: pd.DataFrame):
+        """按列写入单日K线；空表写入长度为0的数组"""
+        if df.empty:
+            columns = {col: np.empty(0, dtype=np.int64 if col == 'volume' else np.float64) for col in _COLUMNS}
+            timestamps = np.empty(0, dtype=np.int64)
+        else:
+            columns = {col: df[col].to_numpy() for col in _COLUMNS}
+            timestamps = df.index.as_unit('ns').asi8
+        # 传入文件对象，避免np.savez自动追加.npz后缀
+        with open(path, 'wb') as f:
+            np.savez(f, timestamp=timestamps, **columns)
+
+    def store(self, symbol: str, df: pd.DataFrame, days: List[date]):
+        """将K线按UTC日切分写入缓存；没有数据的日期（如周末）写入空表，避免重复请求"""
+        if not days:  # 缓存已覆盖所有完整日（只请求了当天），无需切分
+            return
+
+        if df.empty:
+            bounds = [(0, 0)] * len(days)
+        else:
+            # 索引按时间有序：用每日零点二分定位切片边界，不再通过index.date为每行创建date对象
+            starts = pd.DatetimeIndex([datetime.combine(day, time.min, tzinfo=timezone.utc) for day in days])
+            bounds = zip(df.index.searchsorted(starts), df.index.searchsorted(starts + pd.Timedelta(days=1)))
+
+        for day, (lo, hi) in zip(days, bounds):
+            path = self._path(symbol, day)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，写入中途进程被终止也不会留下截断的缓存文件
+            tmp_path = path.with_name(path.name + '.tmp')
+            self._write_day(tmp_path, df.iloc[lo:hi])
+            os.replace(tmp_path, path)
+
+        log.debug("{}: 已缓存{}天历史K线", symbol, len(days))
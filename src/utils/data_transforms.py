@@ -3,78 +3,68 @@
 所有的数据格式转换逻辑都应该是纯函数
 """
 
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
+from operator import itemgetter
 from typing import List, Dict, Optional, Any
-import arrow
+from zoneinfo import ZoneInfo
 
 from models.market_data import BarData
 
+_EASTERN = ZoneInfo('America/New_York')
 
-def alpaca_bar_to_bar_data(bar: Any) -> BarData:
-    """将 Alpaca Bar 对象转换为 BarData"""
+
+def alpaca_raw_bar_to_bar_data(msg: Dict[str, Any]) -> BarData:
+    """将 Alpaca 数据流原始消息（raw_data=True 时的 msgpack dict）转换为 BarData
+
+    跳过 alpaca-py 的 Bar 模型构造，字段直接取自已解码的 dict
+    """
+    vwap = msg.get('vw')
+    trade_count = msg.get('n')
     return BarData(
-        symbol=bar.symbol,
-        timestamp=bar.timestamp,
-        open=float(bar.open),
-        high=float(bar.high),
-        low=float(bar.low),
-        close=float(bar.close),
-        volume=int(bar.volume),
-        vwap=float(bar.vwap) if bar.vwap else None,
-        trade_count=int(bar.trade_count) if bar.trade_count else None
+        symbol=msg['S'],
+        timestamp=msg['t'].to_datetime(),  # msgpack Timestamp -> UTC datetime
+        open=float(msg['o']),
+        high=float(msg['h']),
+        low=float(msg['l']),
+        close=float(msg['c']),
+        volume=int(msg['v']),
+        vwap=None if vwap is None else float(vwap),
+        trade_count=None if trade_count is None else int(trade_count)
     )
 
 
-def bars_to_dataframe(bars: List[BarData]) -> pd.DataFrame:
-    """将 BarData 列表转换为 pandas DataFrame"""
-    if not bars:
-        return pd.DataFrame()
-
-    df_data = []
-    for bar in bars:
-        df_data.append({
-            'timestamp': bar.timestamp,
-            'open': bar.open,
-            'high': bar.high,
-            'low': bar.low,
-            'close': bar.close,
-            'volume': bar.volume,
-            'vwap': bar.vwap
-        })
+_RAW_BAR_FIELDS = itemgetter('o', 'h', 'l', 'c', 'v', 't')
 
-    df = pd.DataFrame(df_data)
-    df.set_index('timestamp', inplace=True)
-    return df
 
+def alpaca_raw_bars_to_dataframe(raw_bars: List[Dict[str, Any]]) -> pd.DataFrame:
+    """将 Alpaca 历史K线接口的原始数据（raw_data=True 时每个symbol的dict列表）转换为 DataFrame
 
-def alpaca_bars_to_dataframe(symbol_bars: List[Any]) -> pd.DataFrame:
-    """将 Alpaca Bar 对象列表转换为 DataFrame"""
-    if not symbol_bars:
+    跳过 SDK 为每根K线构造 Bar 模型；RFC3339 时间字符串整列一次解析
+    """
+    if not raw_bars:
         return pd.DataFrame()
 
-    df_data = []
-    for bar in symbol_bars:
-        df_data.append({
-            'timestamp': bar.timestamp,
-            'open': float(bar.open),
-            'high': float(bar.high),
-            'low': float(bar.low),
-            'close': float(bar.close),
-            'volume': int(bar.volume),
-            'vwap': float(bar.vwap) if bar.vwap else None
-        })
-
-    df = pd.DataFrame(df_data)
-    df.set_index('timestamp', inplace=True)
-    return df
+    opens, highs, lows, closes, volumes, timestamps = zip(*map(_RAW_BAR_FIELDS, raw_bars))
+    vwaps = [bar.get('vw') for bar in raw_bars]
+
+    return pd.DataFrame(
+        {
+            'open': np.array(opens, dtype=np.float64),
+            'high': np.array(highs, dtype=np.float64),
+            'low': np.array(lows, dtype=np.float64),
+            'close': np.array(closes, dtype=np.float64),
+            'volume': np.array(volumes, dtype=np.int64),
+            'vwap': np.array(vwaps, dtype=np.float64)
+        },
+        index=pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True, format='ISO8601'), name='timestamp'),
+        copy=False
+    )
 
 
 def format_timestamp_to_et(timestamp: datetime) -> str:
     """将时间戳格式化为美东时间字符串"""
-    return arrow.get(timestamp).to('US/Eastern').format('YYYY-MM-DD HH:mm:ss.SSSSSS')
-
-
-def get_latest_bars_slice(bars: List[BarData], count: int) -> List[BarData]:
-    """获取最近的 N 根 K线"""
-    return bars[-count:] if bars else []
\ No newline at end of file
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)  # 无时区的时间戳按UTC处理
+    return timestamp.astimezone(_EASTERN).strftime('%Y-%m-%d %H:%M:%S.%f')
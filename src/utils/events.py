@@ -5,7 +5,7 @@
 
 import threading
 import asyncio
-from typing import Dict, List, Callable, Any, Optional
+from typing import Dict, Tuple, Callable, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 from utils.log import setup_logging
@@ -23,10 +23,14 @@ class Event:
 
 
 class EventBus:
-    """线程安全的事件总线"""
+    """线程安全的事件总线
+
+    订阅者列表以不可变元组保存，订阅/取消订阅时整体替换（写时复制），
+    发布时直接读取当前元组，无需加锁或复制
+    """
 
     def __init__(self):
-        self._subscribers: Dict[str, List[Callable]] = {}
+        self._subscribers: Dict[str, Tuple[Callable, ...]] = {}
         self._lock = threading.RLock()
 
     def subscribe(self, event_type: str, callback: Callable[[Event], None]):
@@ -37,20 +41,19 @@ class EventBus:
             callback: 回调函数，接收 Event 对象
         """
         with self._lock:
-            if event_type not in self._subscribers:
-                self._subscribers[event_type] = []
-            self._subscribers[event_type].append(callback)
-            log.debug(f"[EVENT] 订阅事件: {event_type}")
+            self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (callback,)
+            log.debug("[EVENT] 订阅事件: {}", event_type)
 
     def unsubscribe(self, event_type: str, callback: Callable[[Event], None]):
         """取消订阅"""
         with self._lock:
-            if event_type in self._subscribers:
-                try:
-                    self._subscribers[event_type].remove(callback)
-                    log.debug(f"[EVENT] 取消订阅: {event_type}")
-                except ValueError:
-                    pass
+            subscribers = list(self._subscribers.get(event_type, ()))
+            try:
+                subscribers.remove(callback)
+            except ValueError:
+                return
+            self._subscribers[event_type] = tuple(subscribers)
+            log.debug("[EVENT] 取消订阅: {}", event_type)
 
     def publish(self, event_type: str, data: Dict[str, Any], source: str = None):
         """发布事件（同步）
@@ -60,6 +63,12 @@ class EventBus:
             data: 事件数据
             source: 事件来源标识
         """
+        subscribers = self._subscribers.get(event_type, ())
+
+        # 快速路径：没有订阅者时不构造 Event
+        if not subscribers:
+            return
+
         event = Event(
             type=event_type,
             data=data,
@@ -67,9 +76,6 @@ class EventBus:
             source=source
         )
 
-        with self._lock:
-            subscribers = self._subscribers.get(event_type, []).copy()
-
         for callback in subscribers:
             try:
                 callback(event)
@@ -78,6 +84,9 @@ class EventBus:
 
     def publish_async(self, event_type: str, data: Dict[str, Any], source: str = None):
         """发布事件（异步执行回调）"""
+        if not self.get_subscriber_count(event_type):
+            return
+
         def _async_publish():
             self.publish(event_type, data, source)
 
@@ -85,9 +94,9 @@ class EventBus:
 
     def get_subscriber_count(self, event_type: str = None) -> int:
         """获取订阅者数量"""
+        if event_type:
+            return len(self._subscribers.get(event_type, ()))
         with self._lock:
-            if event_type:
-                return len(self._subscribers.get(event_type, []))
             return sum(len(subs) for subs in self._subscribers.values())
 
     def clear_subscribers(self, event_type: str = None):
@@ -0,0 +1,97 @@
+"""
+历史K线批量加载 - 启动时为所有symbol准备预加载数据
+已结束的完整UTC日优先读本地缓存，只从第一个缺失日开始请求API
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List
+
+import pandas as pd
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.requests import StockBarsRequest
+from alpaca.data.timeframe import TimeFrame
+
+from config.config import TradingConfig
+from utils.bar_cache import HistoricalBarCache
+from utils.data_transforms import alpaca_raw_bars_to_dataframe
+from utils.log import setup_logging
+
+log = setup_logging(module_prefix='DATA')
+
+# 并行加载各symbol历史数据（请求API、读写磁盘缓存）的线程数
+HISTORY_LOAD_WORKERS = 8
+
+
+def load_historical_data(config: TradingConfig, symbols: List[str], days: int = 30) -> Dict[str, pd.DataFrame]:
+    """批量加载所有symbol最近days天的分钟K线，返回 symbol -> DataFrame"""
+    try:
+        # raw_data=True：直接返回接口的dict数据，跳过SDK为每根K线构造Bar模型
+        client = StockHistoricalDataClient(
+            api_key=config.api_key,
+            secret_key=config.secret_key,
+            raw_data=True
+        )
+
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days)
+
+        cache = HistoricalBarCache(config.bar_cache_dir, config.data_feed.value, TimeFrame.Minute.value)
+        complete_days = cache.complete_days(start_date, end_date)
+
+        def merge_symbol_history(symbol: str) -> pd.DataFrame:
+            """按symbol请求缺失部分的历史数据，合并缓存并把新获取的完整日写入缓存"""
+            # 已结束的完整UTC日优先读本地缓存，只从该symbol第一个缺失（或损坏）的日期开始请求API
+            cached, missing_day = cache.load(symbol, complete_days)
+            fetch_day = missing_day or end_date.date()
+            cached_days = [day for day in complete_days if day < fetch_day]
+            fetched_days = [day for day in complete_days if day >= fetch_day]
+
+            # 每个symbol单独请求（从缺失日的UTC零点开始，保证写入缓存的是完整日），
+            # 各symbol的分页请求在线程池中并发进行，而不是在一个多symbol请求里串行翻页
+            request = StockBarsRequest(
+                symbol_or_symbols=symbol,
+                timeframe=TimeFrame.Minute,
+                start=datetime.combine(fetch_day, time.min, tzinfo=timezone.utc),
+                end=end_date,
+                feed=config.data_feed
+            )
+            bars = client.get_stock_bars(request)
+
+            # 按列直接构造DataFrame，不再逐根创建BarData对象
+            fetched = alpaca_raw_bars_to_dataframe(bars.get(symbol, []))
+            cache.store(symbol, fetched, fetched_days)
+
+            # 策略的环形缓冲区只保留最近buffer_size根，拼接前先截取各部分末尾，不复制整段历史
+            parts = [
+                df.iloc[-config.buffer_size:]
+                for df in (cached, fetched) if not df.empty
+            ]
+            if not parts:
+                log.warning(f"{symbol}: 未获取到历史数据")
+                return pd.DataFrame()
+
+            # 单个数据源时直接复用，避免concat复制；按有序索引切片取窗口，避免布尔掩码复制
+            symbol_df = parts[0] if len(parts) == 1 else pd.concat(parts)
+            symbol_df = symbol_df.iloc[symbol_df.index.searchsorted(start_date):]
+            log.info(f"{symbol}: 批量加载了{len(symbol_df)}根历史K线（缓存命中{len(cached_days)}天）")
+            return symbol_df
+
+        def load_symbol_history(symbol: str) -> pd.DataFrame:
+            """单个symbol加载失败只让该symbol没有预加载数据，不影响其它symbol"""
+            try:
+                return merge_symbol_history(symbol)
+            except Exception as e:
+                log.error(f"{symbol}: 加载历史数据失败: {e}")
+                return pd.DataFrame()
+
+        # 各symbol之间相互独立，API请求与缓存文件读写在线程池中并行进行
+        with ThreadPoolExecutor(max_workers=HISTORY_LOAD_WORKERS) as executor:
+            historical_data_by_symbol = dict(zip(symbols, executor.map(load_symbol_history, symbols)))
+
+    except Exception as e:
+        # 创建客户端等公共步骤失败时，所有symbol都没有预加载数据
+        log.error(f"批量加载历史数据失败: {e}")
+        historical_data_by_symbol = {symbol: pd.DataFrame() for symbol in symbols}
+
+    return historical_data_by_symbol